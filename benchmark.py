@@ -6,15 +6,27 @@ Enhanced with threading, resource monitoring, and comprehensive metrics
 
 import asyncio
 import httpx
+import numpy as np
 import time
 import statistics
-import json
+import orjson
 import argparse
+import re
+import glob
+import os
 import psutil
 import threading
 import concurrent.futures
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+from typing import BinaryIO, Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
+
+
+JSON_HEADERS = {"content-type": "application/json"}
+
+
+def _research_body(topic: str) -> bytes:
+    """Encode the /research request body once so it can be reused for every request"""
+    return orjson.dumps({"topic": topic})
 
 
 @dataclass
@@ -25,68 +37,365 @@ class ResourceMetrics:
     threads: int
 
 
+@dataclass
+class _Subscription:
+    """Processes matched for one ResourceMonitor and the metrics collected for it"""
+    name_re: "re.Pattern[str]"
+    base_interval_ms: int
+    max_interval_ms: int
+    metrics: List[ResourceMetrics] = field(default_factory=list)
+    pids: Set[int] = field(default_factory=set)
+    previous_cpu: Optional[float] = None
+
+
+class _SharedResourceSampler:
+    """One background thread sampling processes on behalf of every active ResourceMonitor
+    
+    Each tick reads every matched process once and fans the readings out to the
+    subscriptions whose name pattern matched it, so overlapping monitors share a
+    single process-table scan and one set of per-process reads.
+    """
+    
+    # Re-scan the process table every N samples to pick up new workers
+    RESCAN_EVERY = 10
+    # CPU % point changes between samples that trigger interval back-off / speed-up
+    STABLE_CPU_DELTA = 5.0
+    UNSTABLE_CPU_DELTA = 20.0
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[int, _Subscription] = {}
+        self._next_id = 0
+        self._procs: Dict[int, psutil.Process] = {}
+        # When each handle's cpu_percent() was primed, until its first real reading
+        self._primed_at: Dict[int, float] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+    
+    def register(self, name_re: "re.Pattern[str]", base_interval_ms: int, max_interval_ms: int) -> int:
+        """Start collecting metrics for processes whose name matches name_re"""
+        with self._lock:
+            sub_id = self._next_id
+            self._next_id += 1
+            self._subscriptions[sub_id] = _Subscription(
+                name_re=name_re,
+                base_interval_ms=base_interval_ms,
+                max_interval_ms=max(base_interval_ms, max_interval_ms)
+            )
+            self._refresh_processes()
+            if self._thread is None:
+                # Each thread gets its own stop event so a late-exiting thread never revives
+                self._stop = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(self._stop,), daemon=True)
+                self._thread.start()
+        return sub_id
+    
+    def unregister(self, sub_id: int) -> List[ResourceMetrics]:
+        """Stop a subscription and return its metrics; the thread exits with the last one"""
+        thread = None
+        with self._lock:
+            subscription = self._subscriptions.pop(sub_id)
+            if not self._subscriptions:
+                self._stop.set()
+                thread, self._thread = self._thread, None
+                self._procs = {}
+                self._primed_at = {}
+        if thread:
+            thread.join(timeout=2.0)
+        return subscription.metrics
+    
+    def _refresh_processes(self):
+        """Resolve processes for all subscriptions in one scan, keeping handles already sampled"""
+        procs = {}
+        matched: Dict[int, Set[int]] = {sub_id: set() for sub_id in self._subscriptions}
+        for proc in psutil.process_iter(['name']):
+            try:
+                proc_name = proc.info['name'] or ''
+                sub_ids = [
+                    sub_id for sub_id, sub in self._subscriptions.items()
+                    if sub.name_re.search(proc_name)
+                ]
+                if not sub_ids:
+                    continue
+                if proc.pid in self._procs:
+                    proc = self._procs[proc.pid]
+                else:
+                    # The first cpu_percent() call always returns 0.0; prime it
+                    proc.cpu_percent()
+                    self._primed_at[proc.pid] = time.monotonic()
+                procs[proc.pid] = proc
+                for sub_id in sub_ids:
+                    matched[sub_id].add(proc.pid)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        self._procs = procs
+        self._primed_at = {pid: primed for pid, primed in self._primed_at.items() if pid in procs}
+        for sub_id, pids in matched.items():
+            self._subscriptions[sub_id].pids = pids
+    
+    def _interval_bounds(self) -> Tuple[float, float]:
+        """The most demanding base and max interval across subscriptions, in seconds"""
+        subs = self._subscriptions.values()
+        return (
+            min((sub.base_interval_ms for sub in subs), default=50) / 1000,
+            min((sub.max_interval_ms for sub in subs), default=1000) / 1000,
+        )
+    
+    def _next_interval(self, interval: float, cpu_delta: Optional[float]) -> float:
+        """Back off while CPU usage is stable, speed up when it changes sharply"""
+        base_interval, max_interval = self._interval_bounds()
+        if cpu_delta is None:
+            return min(max(interval, base_interval), max_interval)
+        if cpu_delta < self.STABLE_CPU_DELTA:
+            return min(interval * 2, max_interval)
+        if cpu_delta > self.UNSTABLE_CPU_DELTA:
+            return max(interval / 2, base_interval)
+        return min(max(interval, base_interval), max_interval)
+    
+    def _sample(self) -> Optional[float]:
+        """Take one sample for every subscription; return the largest CPU change seen"""
+        readings = {}
+        # A handle primed moments ago would report CPU over a near-empty window (0 or a spike)
+        min_window = self._interval_bounds()[0] / 2
+        now = time.monotonic()
+        for pid, proc in self._procs.items():
+            primed = self._primed_at.get(pid)
+            if primed is not None:
+                if now - primed < min_window:
+                    continue
+                del self._primed_at[pid]
+            try:
+                with proc.oneshot():
+                    readings[pid] = (
+                        proc.cpu_percent(),
+                        proc.memory_info().rss / (1024 * 1024),  # MB
+                        proc.num_threads()
+                    )
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        
+        max_delta = None
+        for sub in self._subscriptions.values():
+            matched = [readings[pid] for pid in sub.pids if pid in readings]
+            if not matched:
+                continue
+            
+            total_cpu = sum(cpu for cpu, _, _ in matched)
+            sub.metrics.append(ResourceMetrics(
+                cpu_percent=total_cpu,
+                memory_mb=sum(memory for _, memory, _ in matched),
+                threads=sum(threads for _, _, threads in matched)
+            ))
+            if sub.previous_cpu is not None:
+                delta = abs(total_cpu - sub.previous_cpu)
+                max_delta = delta if max_delta is None else max(max_delta, delta)
+            sub.previous_cpu = total_cpu
+        return max_delta
+    
+    def _run(self, stop: threading.Event):
+        """Internal monitoring loop"""
+        samples = 0
+        with self._lock:
+            interval = self._interval_bounds()[0]
+        # Wait one interval before the first sample so primed handles cover a real window
+        next_sample = time.monotonic() + interval
+        while not stop.wait(max(0.0, next_sample - time.monotonic())):
+            try:
+                with self._lock:
+                    if samples and samples % self.RESCAN_EVERY == 0:
+                        self._refresh_processes()
+                    samples += 1
+                    interval = self._next_interval(interval, self._sample())
+            except Exception as e:
+                print(f"Resource monitoring error: {e}")
+                # Forget this thread so the next register() starts a fresh one
+                with self._lock:
+                    if self._thread is threading.current_thread():
+                        self._thread = None
+                break
+            
+            # Schedule against the monotonic clock so sampling cost does not drift the interval
+            next_sample = max(next_sample + interval, time.monotonic())
+
+
+_sampler = _SharedResourceSampler()
+
+
 class ResourceMonitor:
     """Monitor system resource usage for specific processes"""
     
-    def __init__(self, process_names: List[str]):
+    def __init__(self, process_names: List[str], min_samples_needed: int = 5):
         self.process_names = process_names
+        self.min_samples_needed = min_samples_needed
+        # One alternation scans each process name once instead of once per pattern
+        self._name_re = re.compile("|".join(re.escape(name) for name in process_names))
         self.metrics = []
-        self.monitoring = False
-        self.monitor_thread = None
+        self._subscription: Optional[int] = None
     
-    def start_monitoring(self, interval: float = 1.0):
-        """Start monitoring resources"""
-        self.monitoring = True
+    def start_monitoring(self, base_interval_ms: int = 50, max_interval_ms: int = 1000):
+        """Start monitoring resources with an adaptive sampling interval"""
         self.metrics = []
-        self.monitor_thread = threading.Thread(
-            target=self._monitor_loop, 
-            args=(interval,),
-            daemon=True
-        )
-        self.monitor_thread.start()
+        self._subscription = _sampler.register(self._name_re, base_interval_ms, max_interval_ms)
     
     def stop_monitoring(self) -> List[ResourceMetrics]:
-        """Stop monitoring and return collected metrics"""
-        self.monitoring = False
-        if self.monitor_thread:
-            self.monitor_thread.join(timeout=2.0)
+        """Stop monitoring and return collected metrics, or [] if too few were collected"""
+        if self._subscription is not None:
+            self.metrics = _sampler.unregister(self._subscription)
+            self._subscription = None
+        if len(self.metrics) < self.min_samples_needed:
+            print(
+                f"Warning: only {len(self.metrics)} resource samples collected "
+                f"(need {self.min_samples_needed}); treating run as unmonitored"
+            )
+            return []
         return self.metrics
+
+
+def _summarize(values: List[float]) -> Dict[str, float]:
+    """Compute avg/percentile/min/max statistics for a list of durations in ms"""
+    if not values:
+        return {"avg_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0, "min_ms": 0.0}
+    
+    a = np.asarray(values, dtype=np.float64)
+    n = a.size
+    
+    # Linearly interpolated ranks (same definition as np.percentile's default)
+    ranks = np.array([0.50, 0.95, 0.99]) * (n - 1)
+    lo = np.floor(ranks).astype(np.intp)
+    hi = np.minimum(lo + 1, n - 1)
+    
+    # One introselect pass places min, max and every percentile neighbour in sorted position
+    part = np.partition(a, np.unique(np.concatenate(([0, n - 1], lo, hi))))
+    p50, p95, p99 = part[lo] + (part[hi] - part[lo]) * (ranks - lo)
+    return {
+        "avg_ms": float(a.mean()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(part[n - 1]),
+        "min_ms": float(part[0]),
+    }
+
+
+def _latency_histogram(latencies: List[float], bins: int = 50) -> Dict[str, List]:
+    """Histogram-encode latencies so plots and percentiles can be rebuilt without raw samples"""
+    if not latencies:
+        return {"hist": [], "edges": [], "cumulative": []}
+    hist, edges = np.histogram(np.asarray(latencies, dtype=np.float64), bins=bins)
+    return {
+        "hist": hist.tolist(),
+        "edges": edges.tolist(),
+        "cumulative": np.cumsum(hist).tolist(),
+    }
+
+
+def _compute_stats(latencies: List[float], task_times: Dict[str, List[float]], keep_raw: bool = False) -> Dict:
+    """Build the latency and per-task statistics shared by both benchmark modes"""
+    latency_stats = _summarize(latencies)
+    stats = {
+        "avg_latency_ms": latency_stats["avg_ms"],
+        "p50_latency_ms": latency_stats["p50_ms"],
+        "p95_latency_ms": latency_stats["p95_ms"],
+        "p99_latency_ms": latency_stats["p99_ms"],
+        "max_latency_ms": latency_stats["max_ms"],
+        "min_latency_ms": latency_stats["min_ms"],
+        "latency_histogram": _latency_histogram(latencies),
+        "task_statistics": {task: _summarize(times) for task, times in task_times.items()},
+    }
+    if keep_raw:
+        stats["raw_latencies"] = latencies
+    return stats
+
+
+def _write_sample(f: BinaryIO, session_num: int, latency: float, task_times: Dict[str, float]):
+    """Append one request sample to the JSONL samples file"""
+    f.write(orjson.dumps({"n": session_num, "latency_ms": latency, "task_times": task_times}) + b"\n")
+    # Flush so samples survive a crash of the harness mid-run
+    f.flush()
+
+
+def _load_samples(path: str) -> Tuple[List[float], Dict[str, List[float]]]:
+    """Read back the latencies and per-task times written during a run"""
+    latencies = []
+    task_times: Dict[str, List[float]] = {}
+    with open(path, "rb") as f:
+        for line in f:
+            sample = orjson.loads(line)
+            latencies.append(sample["latency_ms"])
+            for task, task_duration in sample["task_times"].items():
+                task_times.setdefault(task, []).append(task_duration)
+    return latencies, task_times
+
+
+class EnergyMonitor:
+    """Measure CPU package energy from Intel RAPL powercap counters"""
     
-    def _monitor_loop(self, interval: float):
-        """Internal monitoring loop"""
-        while self.monitoring:
+    RAPL_ROOT = "/sys/class/powercap"
+    
+    def __init__(self):
+        # zone path -> counter range, for wraparound correction
+        self.zones: Dict[str, int] = {}
+        self._start: Dict[str, int] = {}
+        
+        for path in sorted(glob.glob(os.path.join(self.RAPL_ROOT, "intel-rapl:*"))):
+            # Only top-level package zones; subzones (intel-rapl:0:0) are already counted in them
+            if os.path.basename(path).count(":") != 1:
+                continue
+            if not os.access(os.path.join(path, "energy_uj"), os.R_OK):
+                continue
             try:
-                total_cpu = 0.0
-                total_memory = 0.0
-                total_threads = 0
-                found_processes = 0
-                
-                for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_info', 'num_threads']):
-                    try:
-                        proc_name = proc.info['name']
-                        if any(name in proc_name for name in self.process_names):
-                            cpu = proc.info['cpu_percent'] or 0.0
-                            memory = proc.info['memory_info'].rss / (1024 * 1024)  # MB
-                            threads = proc.info['num_threads'] or 0
-                            
-                            total_cpu += cpu
-                            total_memory += memory
-                            total_threads += threads
-                            found_processes += 1
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        continue
-                
-                if found_processes > 0:
-                    self.metrics.append(ResourceMetrics(
-                        cpu_percent=total_cpu,
-                        memory_mb=total_memory,
-                        threads=total_threads
-                    ))
-                
-                time.sleep(interval)
-            except Exception as e:
-                print(f"Resource monitoring error: {e}")
-                break
+                self.zones[path] = self._read(os.path.join(path, "max_energy_range_uj"))
+            except (OSError, ValueError):
+                continue
+        
+        if not self.zones:
+            print(f"Energy monitoring disabled: no readable RAPL counters under {self.RAPL_ROOT} "
+                  f"(requires an Intel CPU and read access, usually root)")
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.zones)
+    
+    @staticmethod
+    def _read(path: str) -> int:
+        with open(path) as f:
+            return int(f.read())
+    
+    def start_monitoring(self):
+        """Snapshot the energy counters"""
+        self._start = {path: self._read(os.path.join(path, "energy_uj")) for path in self.zones}
+    
+    def stop_monitoring(self) -> Optional[int]:
+        """Return microjoules consumed across all packages since start_monitoring"""
+        if not self.enabled:
+            return None
+        total_uj = 0
+        for path, max_range in self.zones.items():
+            delta = self._read(os.path.join(path, "energy_uj")) - self._start[path]
+            if delta < 0:
+                # Counter wrapped around during the run
+                delta += max_range
+            total_uj += delta
+        return total_uj
+
+
+def _energy_summary(energy_uj: Optional[int], results: Dict) -> Optional[Dict]:
+    """Convert a raw energy reading into totals and per-request figures"""
+    if energy_uj is None:
+        return None
+    successful = results["successful_requests"]
+    return {
+        "energy_uj": energy_uj,
+        "energy_joules": energy_uj / 1e6,
+        "joules_per_request": energy_uj / 1e6 / successful if successful else 0.0,
+    }
+
+
+def _warn_cache_hits(name: str, results: Dict):
+    """Flag responses the service answered from its cache instead of running the workflow"""
+    if results["cache_hits"]:
+        print(f"! {results['cache_hits']}/{results['successful_requests']} {name} responses were served "
+              f"from the server cache; their latencies do not reflect a workflow run")
 
 
 async def benchmark_service_threaded(
@@ -94,76 +403,72 @@ async def benchmark_service_threaded(
     topic: str,
     num_requests: int,
     max_workers: int = 5,
-    timeout: float = 120.0
+    timeout: float = 120.0,
+    keep_raw: bool = False,
+    samples_path: str = "samples.jsonl"
 ) -> Dict:
     """Benchmark service using threading for concurrent requests"""
     
     print(f"Starting threaded benchmark: {num_requests} requests with {max_workers} workers")
+    print(f"Streaming samples to {samples_path}")
     
-    latencies = []
     errors = 0
-    responses = []
-    start_time = time.time()
+    cache_hits = 0
+    body = _research_body(topic)
+    samples_file = open(samples_path, "wb")
+    start_time = time.perf_counter_ns()
     
-    async def make_request(session_num: int) -> Optional[Dict]:
+    async def make_request(client: httpx.AsyncClient, session_num: int) -> bool:
         """Make a single request"""
-        request_start = time.time()
+        nonlocal cache_hits
+        request_start = time.perf_counter_ns()
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                response = await client.post(
-                    f"{url}/research",
-                    json={"topic": f"{topic} (request {session_num})"}
-                )
-                response.raise_for_status()
-                
-                latency = (time.time() - request_start) * 1000
-                data = response.json()
-                
-                print(f"Request {session_num}: {latency:.0f}ms")
-                return {"latency": latency, "response": data}
-                
+            response = await client.post(
+                f"{url}/research",
+                content=body,
+                headers=JSON_HEADERS
+            )
+            response.raise_for_status()
+            
+            latency = (time.perf_counter_ns() - request_start) / 1e6
+            data = orjson.loads(response.content)
+            
+            print(f"Request {session_num}: {latency:.0f}ms")
+            if data.get("cache_hit"):
+                cache_hits += 1
+            # Keep only what the statistics need, not the full report body
+            _write_sample(samples_file, session_num, latency, data.get("task_times", {}))
+            return True
+            
         except Exception as e:
             print(f"Error in request {session_num}: {e}")
-            return None
+            return False
+    
+    # One pooled client for all requests so connections are reused
+    limits = httpx.Limits(max_connections=max_workers, max_keepalive_connections=max_workers)
+    with samples_file:
+        async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+            # A fixed pool of workers pulls request numbers off a queue, so only
+            # max_workers coroutines exist at any time
+            queue: asyncio.Queue = asyncio.Queue()
+            for i in range(num_requests):
+                queue.put_nowait(i + 1)
+            
+            async def worker():
+                nonlocal errors
+                while True:
+                    try:
+                        session_num = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    if not await make_request(client, session_num):
+                        errors += 1
+            
+            await asyncio.gather(*(worker() for _ in range(max(1, max_workers))))
+    
+    total_time = (time.perf_counter_ns() - start_time) / 1e9
     
-    # Use semaphore to limit concurrent requests
-    semaphore = asyncio.Semaphore(max_workers)
-    
-    async def bounded_request(session_num: int):
-        async with semaphore:
-            return await make_request(session_num)
-    
-    # Execute all requests concurrently
-    tasks = [bounded_request(i + 1) for i in range(num_requests)]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    # Process results
-    for result in results:
-        if isinstance(result, Exception):
-            errors += 1
-        elif result is None:
-            errors += 1
-        else:
-            latencies.append(result["latency"])
-            responses.append(result["response"])
-    
-    total_time = time.time() - start_time
-    
-    # Calculate task time statistics
-    task_times = {}
-    for response in responses:
-        for task, duration in response.get("task_times", {}).items():
-            if task not in task_times:
-                task_times[task] = []
-            task_times[task].append(duration)
-    
-    task_stats = {}
-    for task, times in task_times.items():
-        task_stats[task] = {
-            "avg_ms": statistics.mean(times),
-            "p50_ms": statistics.median(times),
-            "p95_ms": statistics.quantiles(times, n=20)[18] if len(times) > 20 else max(times) if times else 0,
-        }
+    latencies, task_times = _load_samples(samples_path)
     
     return {
         "service_url": url,
@@ -171,16 +476,10 @@ async def benchmark_service_threaded(
         "successful_requests": len(latencies),
         "errors": errors,
         "error_rate": errors / num_requests if num_requests > 0 else 0,
+        "cache_hits": cache_hits,
         "total_time_seconds": total_time,
         "throughput_rps": len(latencies) / total_time if total_time > 0 else 0,
-        "avg_latency_ms": statistics.mean(latencies) if latencies else 0,
-        "p50_latency_ms": statistics.median(latencies) if latencies else 0,
-        "p95_latency_ms": statistics.quantiles(latencies, n=20)[18] if len(latencies) > 20 else max(latencies) if latencies else 0,
-        "p99_latency_ms": statistics.quantiles(latencies, n=100)[98] if len(latencies) > 100 else max(latencies) if latencies else 0,
-        "max_latency_ms": max(latencies) if latencies else 0,
-        "min_latency_ms": min(latencies) if latencies else 0,
-        "task_statistics": task_stats,
-        "raw_latencies": latencies
+        **_compute_stats(latencies, task_times, keep_raw)
     }
 
 
@@ -188,79 +487,66 @@ async def benchmark_service(
     url: str, 
     topic: str, 
     requests_per_second: int = 10, 
-    duration: int = 60
+    duration: int = 60,
+    keep_raw: bool = False,
+    samples_path: str = "samples.jsonl"
 ) -> Dict:
     """Benchmark a service with specified load parameters"""
     
-    async with httpx.AsyncClient(timeout=120.0) as client:
-        latencies = []
-        errors = 0
-        responses = []
-        
-        start_time = time.time()
-        request_count = 0
-        
-        print(f"Starting benchmark for {url}")
-        print(f"Target: {requests_per_second} req/s for {duration} seconds")
-        
-        while time.time() - start_time < duration:
-            request_start = time.time()
+    errors = 0
+    cache_hits = 0
+    body = _research_body(topic)
+    request_count = 0
+    
+    print(f"Starting benchmark for {url}")
+    print(f"Target: {requests_per_second} req/s for {duration} seconds")
+    print(f"Streaming samples to {samples_path}")
+    
+    with open(samples_path, "wb") as samples_file:
+        async with httpx.AsyncClient(timeout=120.0) as client:
+            start_time = time.perf_counter_ns()
             
-            try:
-                response = await client.post(
-                    f"{url}/research",
-                    json={"topic": topic}
-                )
-                response.raise_for_status()
+            while (time.perf_counter_ns() - start_time) / 1e9 < duration:
+                request_start = time.perf_counter_ns()
                 
-                latency = (time.time() - request_start) * 1000
-                latencies.append(latency)
+                try:
+                    response = await client.post(
+                        f"{url}/research",
+                        content=body,
+                        headers=JSON_HEADERS
+                    )
+                    response.raise_for_status()
+                    
+                    latency = (time.perf_counter_ns() - request_start) / 1e6
+                    data = orjson.loads(response.content)
+                    _write_sample(samples_file, request_count + 1, latency, data.get("task_times", {}))
+                    if data.get("cache_hit"):
+                        cache_hits += 1
+                    
+                    print(f"Request {request_count + 1}: {latency:.0f}ms")
+                    
+                except Exception as e:
+                    errors += 1
+                    print(f"Error in request {request_count + 1}: {e}")
                 
-                data = response.json()
-                responses.append(data)
+                request_count += 1
                 
-                print(f"Request {request_count + 1}: {latency:.0f}ms")
-                
-            except Exception as e:
-                errors += 1
-                print(f"Error in request {request_count + 1}: {e}")
-            
-            request_count += 1
-            
-            # Wait to maintain request rate
-            elapsed = time.time() - request_start
-            sleep_time = max(0, (1.0 / requests_per_second) - elapsed)
-            await asyncio.sleep(sleep_time)
-        
-        # Calculate task time statistics
-        task_times = {}
-        for response in responses:
-            for task, duration in response.get("task_times", {}).items():
-                if task not in task_times:
-                    task_times[task] = []
-                task_times[task].append(duration)
-        
-        task_stats = {}
-        for task, times in task_times.items():
-            task_stats[task] = {
-                "avg_ms": statistics.mean(times),
-                "p50_ms": statistics.median(times),
-                "p95_ms": statistics.quantiles(times, n=20)[18] if len(times) > 20 else max(times) if times else 0,
-            }
-        
-        return {
-            "service_url": url,
-            "total_requests": request_count,
-            "successful_requests": len(latencies),
-            "errors": errors,
-            "error_rate": errors / request_count if request_count > 0 else 0,
-            "avg_latency_ms": statistics.mean(latencies) if latencies else 0,
-            "p50_latency_ms": statistics.median(latencies) if latencies else 0,
-            "p95_latency_ms": statistics.quantiles(latencies, n=20)[18] if len(latencies) > 20 else max(latencies) if latencies else 0,
-            "p99_latency_ms": statistics.quantiles(latencies, n=100)[98] if len(latencies) > 100 else max(latencies) if latencies else 0,
-            "task_statistics": task_stats,
-            "raw_latencies": latencies
-        }
+                # Wait to maintain request rate
+                elapsed = (time.perf_counter_ns() - request_start) / 1e9
+                sleep_time = max(0, (1.0 / requests_per_second) - elapsed)
+                await asyncio.sleep(sleep_time)
+    
+    latencies, task_times = _load_samples(samples_path)
+    
+    return {
+        "service_url": url,
+        "total_requests": request_count,
+        "successful_requests": len(latencies),
+        "errors": errors,
+        "error_rate": errors / request_count if request_count > 0 else 0,
+        "cache_hits": cache_hits,
+        **_compute_stats(latencies, task_times, keep_raw)
+    }
 
 
 async def run_comparison_benchmark(
@@ -269,17 +555,31 @@ async def run_comparison_benchmark(
     topic: str = "artificial intelligence in healthcare",
     num_requests: int = 10,
     max_workers: int = 5,
-    monitor_resources: bool = True
+    monitor_resources: bool = True,
+    warmup: bool = True,
+    save_raw_latencies: bool = False,
+    energy: bool = False
 ):
     """Run benchmark against both services and compare results"""
     
+    # Wall-clock time is only used to timestamp the saved results
+    started_at = time.time()
+    
+    # A handful of requests is over too quickly for resource samples to mean anything
+    monitoring_skipped = monitor_resources and num_requests <= 3
+    if monitoring_skipped:
+        monitor_resources = False
+    
     print("=" * 60)
     print("AI Workflow Benchmark: Rust graph-flow vs Python LangGraph")
     print("=" * 60)
     print(f"Topic: {topic}")
     print(f"Total Requests: {num_requests}")
     print(f"Max Concurrent Workers: {max_workers}")
-    print(f"Resource Monitoring: {'Enabled' if monitor_resources else 'Disabled'}")
+    print(f"Resource Monitoring: {'Enabled' if monitor_resources else 'Disabled'}"
+          f"{' (too few requests)' if monitoring_skipped else ''}")
+    print(f"Warmup: {'Enabled' if warmup else 'Disabled'}")
+    print(f"Energy Monitoring: {'Enabled' if energy else 'Disabled'}")
     print()
     
     # Check if services are running
@@ -299,6 +599,23 @@ async def run_comparison_benchmark(
         except Exception as e:
             print(f"✗ Python service not available: {e}")
             return
+        
+        # Send one discarded request to each service so cold-start costs
+        # are not recorded in the measured latencies
+        if warmup:
+            body = _research_body(topic)
+            for name, url in (("Rust", rust_url), ("Python", python_url)):
+                try:
+                    response = await client.post(
+                        f"{url}/research",
+                        content=body,
+                        headers=JSON_HEADERS,
+                        timeout=120.0
+                    )
+                    response.raise_for_status()
+                    print(f"✓ {name} service warmed up")
+                except Exception as e:
+                    print(f"! {name} warmup request failed: {e}")
     
     print("\nStarting benchmarks...\n")
     
@@ -309,37 +626,59 @@ async def run_comparison_benchmark(
     if monitor_resources:
         rust_monitor = ResourceMonitor(["rust-graphflow", "target/release"])
         python_monitor = ResourceMonitor(["python", "uvicorn", "main.py"])
+    
+    energy_monitor = None
+    if energy:
+        energy_monitor = EnergyMonitor()
+        if not energy_monitor.enabled:
+            energy_monitor = None
 
             # Run Python benchmark
     print("🐍 Testing Python service...")
     if python_monitor:
         python_monitor.start_monitoring()
+    if energy_monitor:
+        energy_monitor.start_monitoring()
     
     python_results = await benchmark_service_threaded(
-        python_url, topic, num_requests, max_workers
+        python_url, topic, num_requests, max_workers,
+        keep_raw=save_raw_latencies, samples_path="python_samples.jsonl"
     )
     
+    python_energy = None
+    if energy_monitor:
+        python_energy = _energy_summary(energy_monitor.stop_monitoring(), python_results)
+    
     python_resource_metrics = []
     if python_monitor:
         python_resource_metrics = python_monitor.stop_monitoring()
     
     print(f"Python benchmark completed: {python_results['successful_requests']}/{python_results['total_requests']} successful")
+    _warn_cache_hits("Python", python_results)
     print()
     
     # Run Rust benchmark first
     print("🦀 Testing Rust service...")
     if rust_monitor:
         rust_monitor.start_monitoring()
+    if energy_monitor:
+        energy_monitor.start_monitoring()
     
     rust_results = await benchmark_service_threaded(
-        rust_url, topic, num_requests, max_workers
+        rust_url, topic, num_requests, max_workers,
+        keep_raw=save_raw_latencies, samples_path="rust_samples.jsonl"
     )
     
+    rust_energy = None
+    if energy_monitor:
+        rust_energy = _energy_summary(energy_monitor.stop_monitoring(), rust_results)
+    
     rust_resource_metrics = []
     if rust_monitor:
         rust_resource_metrics = rust_monitor.stop_monitoring()
     
     print(f"Rust benchmark completed: {rust_results['successful_requests']}/{rust_results['total_requests']} successful")
+    _warn_cache_hits("Rust", rust_results)
     print()
     
 
@@ -400,6 +739,18 @@ async def run_comparison_benchmark(
         print("\nResource monitoring was enabled but no metrics collected.")
         print("Make sure the services are running and process names are correct.")
     
+    # Energy comparison (whole CPU package, so it includes this harness and anything else running)
+    if rust_energy and python_energy:
+        print("\nEnergy Usage (CPU package):")
+        print("-" * 50)
+        
+        rust_jpr = rust_energy['joules_per_request']
+        python_jpr = python_energy['joules_per_request']
+        jpr_improvement = python_jpr / rust_jpr if rust_jpr > 0 else 0
+        
+        print(f"{'Total Energy (J)':<25} {rust_energy['energy_joules']:<15.1f} {python_energy['energy_joules']:<15.1f}")
+        print(f"{'Joules per Request':<25} {rust_jpr:<15.2f} {python_jpr:<15.2f} {jpr_improvement:.2f}x")
+    
     # Task breakdown
     print("\nTask Performance Breakdown:")
     print("-" * 50)
@@ -414,17 +765,29 @@ async def run_comparison_benchmark(
             improvement = python_avg / rust_avg
             print(f"{task:<25} {rust_avg:<15.0f} {python_avg:<15.0f} {improvement:.2f}x")
     
+    # Raw samples go to compact binary files rather than the JSON summary
+    if save_raw_latencies:
+        for name, service_results in (("rust", rust_results), ("python", python_results)):
+            path = f"{name}_latencies.npy"
+            np.save(path, np.asarray(service_results.pop("raw_latencies"), dtype=np.float64))
+            print(f"Raw {name} latencies saved to {path}")
+    
     # Save detailed results
     results = {
-        "timestamp": time.time(),
+        "timestamp": started_at,
         "benchmark_config": {
             "topic": topic,
             "num_requests": num_requests,
             "max_workers": max_workers,
-            "monitor_resources": monitor_resources
+            "monitor_resources": monitor_resources,
+            "warmup": warmup,
+            "save_raw_latencies": save_raw_latencies,
+            "energy": energy
         },
         "rust_results": rust_results,
         "python_results": python_results,
+        "rust_energy": rust_energy,
+        "python_energy": python_energy,
         "rust_resource_metrics": [
             {"cpu_percent": m.cpu_percent, "memory_mb": m.memory_mb, "threads": m.threads}
             for m in rust_resource_metrics
@@ -435,8 +798,8 @@ async def run_comparison_benchmark(
         ] if python_resource_metrics else []
     }
     
-    with open("benchmark_results.json", "w") as f:
-        json.dump(results, f, indent=2)
+    with open("benchmark_results.json", "wb") as f:
+        f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
     
     print(f"\nDetailed results saved to benchmark_results.json")
     print("\nBenchmark completed! 🎉")
@@ -464,6 +827,9 @@ Examples:
   
   # Disable resource monitoring for faster execution
   python benchmark.py --no-resource-monitoring
+  
+  # Measure cold-start behaviour by skipping the warmup request
+  python benchmark.py --no-warmup
         """
     )
     parser.add_argument("--rust-url", default="http://localhost:3000", help="Rust service URL")
@@ -472,6 +838,9 @@ Examples:
     parser.add_argument("--num-requests", type=int, default=10, help="Total number of requests to send")
     parser.add_argument("--max-workers", type=int, default=5, help="Maximum concurrent workers")
     parser.add_argument("--no-resource-monitoring", action="store_true", help="Disable resource monitoring")
+    parser.add_argument("--no-warmup", action="store_true", help="Skip the discarded warmup request per service")
+    parser.add_argument("--save-raw-latencies", action="store_true", help="Save per-request latencies to <service>_latencies.npy")
+    parser.add_argument("--energy", action="store_true", help="Measure CPU package energy via Intel RAPL (Linux, needs read access to powercap)")
     
     args = parser.parse_args()
     
@@ -481,7 +850,10 @@ Examples:
         topic=args.topic,
         num_requests=args.num_requests,
         max_workers=args.max_workers,
-        monitor_resources=not args.no_resource_monitoring
+        monitor_resources=not args.no_resource_monitoring,
+        warmup=not args.no_warmup,
+        save_raw_latencies=args.save_raw_latencies,
+        energy=args.energy
     )
 
 
@@ -0,0 +1,79 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Optional
+
+import orjson
+
+from .log_queue import log_info
+
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+PURGE_INTERVAL_SECONDS = 60 * 60
+
+
+class ResponseCache:
+    """On-disk cache of LLM and search responses, keyed by a hash of the request"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # sqlite3 calls run in worker threads; one connection guarded by a lock is enough here
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._purge_expired()
+
+    def _purge_expired(self) -> None:
+        # Called with the lock held; keeps the file from growing with rows nobody reads again
+        self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+        self._conn.commit()
+        self._last_purge = time.monotonic()
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        return hashlib.sha256(orjson.dumps(parts, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+    def _get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return orjson.loads(row[0])
+
+    def _set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, orjson.dumps(value), time.time() + ttl_seconds)
+            )
+            self._conn.commit()
+            if time.monotonic() - self._last_purge > PURGE_INTERVAL_SECONDS:
+                self._purge_expired()
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        value = await asyncio.to_thread(self._get, key)
+        log_info("response_cache_lookup", namespace=namespace, cache_hit=value is not None)
+        return value
+
+    async def set(self, key: str, value: Any, ttl_seconds: float = DEFAULT_TTL_SECONDS) -> None:
+        await asyncio.to_thread(self._set, key, value, ttl_seconds)
+
+
+@lru_cache(maxsize=None)
+def get_response_cache() -> Optional[ResponseCache]:
+    # Opt-in: replayed responses measure disk reads, not the OpenAI and Tavily APIs
+    if os.getenv("RESPONSE_CACHE", "0") != "1":
+        return None
+    return ResponseCache(os.getenv("RESPONSE_CACHE_PATH", ".cache/responses.sqlite3"))
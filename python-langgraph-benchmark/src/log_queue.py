@@ -0,0 +1,51 @@
+import asyncio
+from typing import Any, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+MAX_PENDING_LOGS = 1024
+
+_queue: Optional[asyncio.Queue] = None
+_worker: Optional[asyncio.Task] = None
+
+
+def log_info(event: str, **kwargs: Any) -> None:
+    # Records are rendered by a background task so formatting stays off the request path.
+    # The caller's bound contextvars are captured now, while they are still in scope.
+    global _queue, _worker
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        logger.info(event, **kwargs)
+        return
+    
+    if _worker is None or _worker.done() or _worker.get_loop() is not loop:
+        _queue = asyncio.Queue(maxsize=MAX_PENDING_LOGS)
+        _worker = loop.create_task(_drain(_queue))
+    
+    if _queue.full():
+        # Drop the oldest record rather than make a request wait on logging
+        _queue.get_nowait()
+        _queue.task_done()
+    _queue.put_nowait((event, {**structlog.contextvars.get_contextvars(), **kwargs}))
+
+
+async def _drain(queue: asyncio.Queue) -> None:
+    # The task inherited its creator's contextvars; every record carries its own instead
+    structlog.contextvars.clear_contextvars()
+    while True:
+        event, kwargs = await queue.get()
+        try:
+            logger.info(event, **kwargs)
+        except Exception:
+            # A record that fails to render must not stop the worker, but should not vanish either
+            logger.exception("log_record_failed", failed_event=event)
+        finally:
+            queue.task_done()
+
+
+async def flush_logs() -> None:
+    if _queue is not None and _worker is not None and not _worker.done():
+        await _queue.join()
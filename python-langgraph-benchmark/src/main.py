@@ -1,17 +1,23 @@
+import argparse
 import asyncio
+import os
 import time
 import uuid
 from contextlib import asynccontextmanager
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 
 import structlog
 import uvicorn
+from cachetools import TTLCache
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
 from .workflow import create_research_workflow
 from .models import ResearchRequest, ResearchResponse, ResearchState
+from .log_queue import flush_logs, log_info
+from .tools import close_http_client, tavily_api_key
 
 logger = structlog.get_logger()
 
@@ -19,11 +25,15 @@ logger = structlog.get_logger()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting Python LangGraph benchmark server")
+    # Fail at startup rather than on the first search
+    tavily_api_key()
     yield
     logger.info("Stopping Python LangGraph benchmark server")
+    await flush_logs()
+    await close_http_client()
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -41,45 +51,103 @@ async def health():
     return "OK"
 
 
-@app.post("/research")
-async def research(request: ResearchRequest) -> ResearchResponse:
-    start_time = time.time()
+# (questions, summary, report, task_times) of a completed workflow run
+CachedResearch = Tuple[List[str], str, str, Dict[str, float]]
+
+# Off by default so every benchmarked request runs the workflow, as the Rust service does
+server_cache_enabled = os.getenv("RESEARCH_SERVER_CACHE", "0") == "1"
+_research_cache: TTLCache = TTLCache(maxsize=256, ttl=3600)
+_research_locks: Dict[str, asyncio.Lock] = {}
+# Requests holding or waiting on each topic's lock; the lock is dropped only when none remain
+_research_lock_users: Dict[str, int] = {}
+
+
+async def run_workflow(topic: str, session_id: str) -> CachedResearch:
+    initial_state = ResearchState(
+        topic=topic,
+        questions=[],
+        research_results=[],
+        pending_searches=[],
+        summary="",
+        report="",
+        task_times={}
+    )
+    
+    config = {"configurable": {"thread_id": session_id}}
+    
+    final_state = await workflow.ainvoke(initial_state, config)
+    
+    return (
+        final_state["questions"],
+        final_state["summary"],
+        final_state["report"],
+        final_state["task_times"]
+    )
+
+
+async def cached_workflow(topic: str, session_id: str) -> Tuple[CachedResearch, bool]:
+    if not server_cache_enabled:
+        return await run_workflow(topic, session_id), False
+    
+    key = topic.strip().lower()
+    cached = _research_cache.get(key)
+    if cached is not None:
+        return cached, True
+    
+    # One workflow run per topic; concurrent requests for it wait and reuse the result
+    lock = _research_locks.setdefault(key, asyncio.Lock())
+    _research_lock_users[key] = _research_lock_users.get(key, 0) + 1
+    try:
+        async with lock:
+            cached = _research_cache.get(key)
+            if cached is not None:
+                return cached, True
+            
+            result = await run_workflow(topic, session_id)
+            _research_cache[key] = result
+            return result, False
+    finally:
+        # locked() is already False while queued waiters are about to acquire it, so count users
+        _research_lock_users[key] -= 1
+        if not _research_lock_users[key]:
+            del _research_lock_users[key]
+            del _research_locks[key]
+
+
+@app.post("/research", response_model=ResearchResponse)
+async def research(request: ResearchRequest) -> ORJSONResponse:
+    start_time = time.perf_counter_ns()
     session_id = str(uuid.uuid4())
     
-    logger.info("starting_research_workflow", session_id=session_id, topic=request.topic)
+    log_info("starting_research_workflow", session_id=session_id, topic=request.topic)
     
     try:
-        initial_state = ResearchState(
-            topic=request.topic,
-            questions=[],
-            research_results=[],
-            summary="",
-            report="",
-            task_times={}
+        (questions, summary, report, task_times), cache_hit = await cached_workflow(
+            request.topic, session_id
         )
         
-        config = {"configurable": {"thread_id": session_id}}
-        
-        final_state = await workflow.ainvoke(initial_state, config)
-        
-        total_time_ms = int((time.time() - start_time) * 1000)
+        total_time_ms = (time.perf_counter_ns() - start_time) // 1_000_000
         
-        logger.info(
+        log_info(
             "workflow_completed",
             session_id=session_id,
             total_time_ms=total_time_ms,
-            task_times=final_state["task_times"]
+            task_times=task_times,
+            cache_hit=cache_hit
         )
         
-        return ResearchResponse(
-            session_id=session_id,
-            topic=request.topic,
-            questions=final_state["questions"],
-            summary=final_state["summary"],
-            report=final_state["report"],
-            total_time_ms=total_time_ms,
-            task_times=final_state["task_times"]
-        )
+        # The fields come straight from the workflow, so serialize them directly instead of
+        # building a model; response_model still documents the schema
+        return ORJSONResponse({
+            "session_id": session_id,
+            "topic": request.topic,
+            "questions": questions,
+            "summary": summary,
+            "report": report,
+            "total_time_ms": total_time_ms,
+            "task_times": {} if cache_hit else task_times,
+            "cache_hit": cache_hit
+        })
         
     except Exception as e:
         logger.error("workflow_error", session_id=session_id, error=str(e))
@@ -89,8 +157,21 @@ async def research(request: ResearchRequest) -> ResearchResponse:
 if __name__ == "__main__":
     import structlog
     
+    parser = argparse.ArgumentParser(description="Python LangGraph benchmark server")
+    parser.add_argument(
+        "--server-cache",
+        action="store_true",
+        help="Cache completed results per topic instead of running the full workflow for every request"
+    )
+    args = parser.parse_args()
+    if args.server_cache:
+        # Passed via the environment so the reloader's worker process sees it too
+        os.environ["RESEARCH_SERVER_CACHE"] = "1"
+    
     structlog.configure(
         processors=[
+            # Picks up the node bound by each workflow step
+            structlog.contextvars.merge_contextvars,
             structlog.stdlib.filter_by_level,
             structlog.stdlib.add_logger_name,
             structlog.stdlib.add_log_level,
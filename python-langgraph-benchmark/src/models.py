@@ -1,8 +1,12 @@
-from typing import List, Dict, TypedDict
-from pydantic import BaseModel
+import asyncio
+import operator
+from typing import Annotated, List, Dict, TypedDict
+from pydantic import BaseModel, ConfigDict
 
 
 class ResearchRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid", frozen=True)
+    
     topic: str
 
 
@@ -13,7 +17,9 @@ class ResearchResponse(BaseModel):
     summary: str
     report: str
     total_time_ms: int
-    task_times: Dict[str, int]
+    # Empty when the result came from the server cache, since no workflow ran for this request
+    task_times: Dict[str, float]
+    cache_hit: bool = False
 
 
 class Finding(TypedDict):
@@ -27,10 +33,18 @@ class ResearchResult(TypedDict):
     findings: List[Finding]
 
 
+def merge_task_times(current: Dict[str, float], update: Dict[str, float]) -> Dict[str, float]:
+    return {**current, **update}
+
+
+# Nodes return only the fields they change; the annotated reducers merge them into the state
 class ResearchState(TypedDict):
     topic: str
     questions: List[str]
-    research_results: List[ResearchResult]
+    research_results: Annotated[List[ResearchResult], operator.add]
+    # Searches started while questions were still streaming in, one per question
+    pending_searches: List["asyncio.Task[List[dict]]"]
     summary: str
     report: str
-    task_times: Dict[str, int]
\ No newline at end of file
+    # Milliseconds, with sub-millisecond precision from perf_counter_ns
+    task_times: Annotated[Dict[str, float], merge_task_times]
\ No newline at end of file
@@ -1,9 +1,55 @@
+import importlib.util
 import os
-from typing import Type, Dict, Any
+from functools import lru_cache
+from typing import Type, Dict, Any, Optional
 
+import httpx
+import orjson
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
-from tavily import AsyncTavilyClient
+
+
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+
+# HTTP/2 lets the concurrent fan-out share one connection per host, when h2 is installed
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def tavily_api_key() -> str:
+    api_key = os.getenv("TAVILY_API_KEY")
+    if not api_key:
+        raise ValueError("TAVILY_API_KEY environment variable not set")
+    return api_key
+
+
+# One pooled client for OpenAI and Tavily, so connections and TLS sessions are reused
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            http2=_HTTP2,
+            timeout=httpx.Timeout(60, connect=5),
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+        )
+    return _http_client
+
+
+# Built on first use so the key is read once rather than on every search
+@lru_cache(maxsize=None)
+def _search_headers() -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {tavily_api_key()}",
+        "Content-Type": "application/json"
+    }
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
 
 class TavilySearchInput(BaseModel):
@@ -19,17 +65,16 @@ class TavilySearchTool(BaseTool):
         raise NotImplementedError("Use ainvoke for async operation")
     
     async def _arun(self, query: str) -> Dict[str, Any]:
-        api_key = os.getenv("TAVILY_API_KEY")
-        if not api_key:
-            raise ValueError("TAVILY_API_KEY environment variable not set")
-        
-        client = AsyncTavilyClient(api_key=api_key)
-        
-        response = await client.search(
-            query=query,
-            max_results=5,
-            search_depth="advanced",
-            include_raw_content=True
+        response = await get_http_client().post(
+            TAVILY_SEARCH_URL,
+            content=orjson.dumps({
+                "query": query,
+                "max_results": 5,
+                "search_depth": "advanced",
+                "include_raw_content": True
+            }),
+            headers=_search_headers()
         )
+        response.raise_for_status()
         
-        return response
\ No newline at end of file
+        return orjson.loads(response.content)
\ No newline at end of file
@@ -1,203 +1,478 @@
 import asyncio
+import io
+import operator
+import os
 import time
-from typing import List
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple
 
+import httpx
+import openai
+import orjson
 import structlog
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import AIMessage, SystemMessage, HumanMessage
 from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph
-from tavily import TavilyClient
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
 
+from .cache import ResponseCache, get_response_cache
+from .log_queue import log_info
 from .models import ResearchState, ResearchResult, Finding
-from .tools import TavilySearchTool
+from .tools import TavilySearchTool, get_http_client
 
 logger = structlog.get_logger()
 
+# Caps concurrent planning LLM calls (USE_LLM_PLANNING=1) to keep OpenAI tail latency and 429s
+# down. It is shared by all requests, so it throttles across them; direct searches are not capped.
+_SEM = asyncio.Semaphore(int(os.getenv("RESEARCH_CONCURRENCY", "4")))
+
+# Search each question directly by default; set USE_LLM_PLANNING=1 to have the LLM plan the
+# searches, as the Rust service does
+USE_LLM_PLANNING = os.getenv("USE_LLM_PLANNING", "0") == "1"
+
+# Unpacks a Finding in one call in the loops that touch every finding
+_finding_fields = operator.itemgetter("title", "url", "content")
+
+# Prompts are built once at import. Static instructions come first and per-request text
+# last, so the prompt prefix is identical across requests for OpenAI's prompt cache.
+_SYS_EXTRACT = SystemMessage(content="""You are a research assistant. Generate 3-5 specific research questions about the given topic.
+
+Requirements:
+- Questions should be factual and answerable through web research
+- Questions should cover different aspects of the topic
+- Questions should be clear and well-defined
+- Format: Return only the questions, one per line, no numbering or bullets""")
+_HUMAN_EXTRACT = HumanMessage(content="Generate research questions about the topic in the next message.")
+
+_SYS_PLAN = SystemMessage(content="""Search for information to answer the research question.
+Use the tavily_search tool to find relevant information. Search for specific, factual information that directly addresses the question.""")
+_HUMAN_PLAN = HumanMessage(content="Research the question in the next message.")
+
+_SYS_REPORT = SystemMessage(content="""You are a research assistant. Summarize the key findings from the research and create a comprehensive research report.
+
+Respond with a JSON object with exactly two string fields:
+- "summary": the summary of findings
+- "report": the research report
+
+Summary requirements:
+- Create a concise summary (3-5 paragraphs) of the most important findings
+- Focus on facts and insights that directly relate to the topic
+- Organize information logically
+- Use clear, professional language
+- Do not include URLs or citations in the summary
+
+Report requirements:
+- Create a well-structured markdown report
+- Include an executive summary
+- Organize findings by research question
+- Add a conclusion section
+- Include citations with URLs where appropriate
+- Use proper markdown formatting (headers, lists, etc.)
+- Make it professional and comprehensive""")
+_HUMAN_REPORT = HumanMessage(content="Summarize the findings and create the research report for the topic in the next message, based on the research questions and raw research data given with it.")
+
+
+# Each node can use its own model; extracting a few short questions does not need the report model
+_MODELS = {
+    "extract": os.getenv("EXTRACT_MODEL", "gpt-4.1-nano"),
+    "research": os.getenv("RESEARCH_MODEL", "gpt-4o-mini"),
+    "report": os.getenv("REPORT_MODEL", "gpt-4o-mini"),
+}
+
+
+# Clients are built once per role and shared by every request. They are created
+# lazily so importing the module does not require OPENAI_API_KEY.
+@lru_cache(maxsize=None)
+def _llm(role: str) -> ChatOpenAI:
+    # stream_usage reports token usage on streamed responses too
+    return ChatOpenAI(
+        model=_MODELS[role],
+        temperature=0,
+        stream_usage=True,
+        # _retry_transient is the only retry layer, so one 429 is not retried by both
+        max_retries=0,
+        http_async_client=get_http_client()
+    )
+
+
+@lru_cache(maxsize=None)
+def _tavily() -> TavilySearchTool:
+    return TavilySearchTool()
+
+
+@lru_cache(maxsize=None)
+def _llm_with_tools():
+    # Forcing a single tavily_search call means the model only emits the call's arguments
+    return _llm("research").bind_tools(
+        [_tavily()],
+        tool_choice="tavily_search",
+        parallel_tool_calls=False
+    ).bind(max_tokens=64)
+
+
+@lru_cache(maxsize=None)
+def _llm_json():
+    return _llm("report").bind(response_format={"type": "json_object"})
+
+
+def _log_prompt_cache(node: str, response) -> None:
+    # OpenAI caches prompt prefixes automatically; cached_tokens shows how much was reused
+    usage = response.usage_metadata or {}
+    log_info(
+        "llm_usage",
+        node=node,
+        input_tokens=usage.get("input_tokens", 0),
+        cached_tokens=usage.get("input_token_details", {}).get("cache_read", 0)
+    )
+
+
+def _llm_cache_key(runnable, messages: list, variant: str) -> Tuple[Optional[ResponseCache], Optional[str]]:
+    # variant names what is bound to the model (plain, forced_tool, json) so it becomes part of the key
+    cache = get_response_cache()
+    llm = getattr(runnable, "bound", runnable)
+    if cache is None or (llm.temperature or 0) > 0:
+        return None, None
+    return cache, cache.make_key("llm", llm.model_name, variant, [[m.type, m.content] for m in messages])
+
+
+def _is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, (openai.RateLimitError, openai.APITimeoutError, httpx.TimeoutException)):
+        return True
+    # Tavily signals rate limiting with a plain 429
+    return isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code == 429
+
+
+# Rate limits and timeouts are retried with jittered backoff instead of failing the request
+_retry_transient = retry(
+    wait=wait_random_exponential(multiplier=0.5, max=10),
+    stop=stop_after_attempt(4),
+    retry=retry_if_exception(_is_transient),
+    reraise=True
+)
+
+
+@_retry_transient
+async def _call_llm(runnable, messages: list) -> AIMessage:
+    return await runnable.ainvoke(messages)
+
+
+@_retry_transient
+async def _call_search(args: dict) -> dict:
+    return await _tavily().ainvoke(args)
+
+
+async def _ainvoke_llm(
+    runnable,
+    messages: list,
+    *,
+    node: str,
+    variant: str,
+    parse: Optional[Callable[[AIMessage], Any]] = None
+) -> Any:
+    # parse turns the reply into what the node needs; a reply is only cached once it parses,
+    # so a malformed one is never replayed
+    parse = parse or (lambda response: response)
+    cache, key = _llm_cache_key(runnable, messages, variant)
+    if cache is not None:
+        cached = await cache.get(node, key)
+        if cached is not None:
+            return parse(AIMessage(content=cached["content"], tool_calls=cached["tool_calls"]))
+    
+    response = await _call_llm(runnable, messages)
+    _log_prompt_cache(node, response)
+    parsed = parse(response)
+    if cache is not None:
+        await cache.set(key, {"content": response.content, "tool_calls": response.tool_calls})
+    return parsed
+
+
+async def _astream_lines(runnable, messages: list, *, node: str, variant: str) -> AsyncIterator[str]:
+    # Yield each complete line of the response as soon as it has streamed in
+    cache, key = _llm_cache_key(runnable, messages, variant)
+    if cache is not None:
+        cached = await cache.get(node, key)
+        if cached is not None:
+            for line in cached["content"].split("\n"):
+                yield line
+            return
+    
+    response = None
+    buffer = ""
+    async for chunk in runnable.astream(messages):
+        response = chunk if response is None else response + chunk
+        buffer += chunk.content
+        while "\n" in buffer:
+            line, buffer = buffer.split("\n", 1)
+            yield line
+    yield buffer
+    
+    if response is not None:
+        _log_prompt_cache(node, response)
+        if cache is not None:
+            await cache.set(key, {"content": response.content, "tool_calls": []})
+
+
+async def _search(args: dict) -> dict:
+    cache = get_response_cache()
+    if cache is None:
+        return await _call_search(args)
+    
+    key = cache.make_key("tavily", args)
+    cached = await cache.get("tavily_search", key)
+    if cached is not None:
+        return cached
+    
+    search_results = await _call_search(args)
+    await cache.set(key, search_results)
+    return search_results
+
+
+def _compact_findings(results: List[ResearchResult], max_chars: int = 800) -> List[ResearchResult]:
+    # Searches for related questions return overlapping sources; send each passage to the LLM once
+    seen_urls = set()
+    seen_content = set()
+    add_url = seen_urls.add
+    add_content = seen_content.add
+    compacted = []
+    for result in results:
+        findings = []
+        for finding in result["findings"]:
+            title, url, content = _finding_fields(finding)
+            # hash() of the leading text is enough for in-process near-duplicate detection
+            content_key = hash(content[:256])
+            if url in seen_urls or content_key in seen_content:
+                continue
+            add_url(url)
+            add_content(content_key)
+            findings.append(Finding(title=title, url=url, content=content[:max_chars]))
+        compacted.append(ResearchResult(question=result["question"], findings=findings))
+    return compacted
+
 
 def create_research_workflow():
     workflow = StateGraph(ResearchState)
     
     workflow.add_node("extract_questions", extract_questions)
     workflow.add_node("research", research)
-    workflow.add_node("summarize", summarize)
-    workflow.add_node("generate_report", generate_report)
+    workflow.add_node("summarize_and_report", summarize_and_report)
     
     workflow.add_edge("extract_questions", "research")
-    workflow.add_edge("research", "summarize")
-    workflow.add_edge("summarize", "generate_report")
+    workflow.add_edge("research", "summarize_and_report")
     
     workflow.set_entry_point("extract_questions")
     
-    return workflow.compile()
+    # No checkpointer: the benchmark never resumes a run, so state is never serialized between
+    # nodes. pending_searches holds live asyncio tasks, which no checkpoint serializer could store.
+    return workflow.compile(checkpointer=None)
 
 
-async def extract_questions(state: ResearchState) -> ResearchState:
-    start_time = time.time()
-    logger.info("starting_question_extraction", topic=state["topic"])
-    
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+async def extract_questions(state: ResearchState) -> dict:
+    start_ns = time.perf_counter_ns()
+    structlog.contextvars.bind_contextvars(node="extract_questions")
     
     messages = [
-        SystemMessage(content="""You are a research assistant. Generate 3-5 specific research questions about the given topic.
-
-Requirements:
-- Questions should be factual and answerable through web research
-- Questions should cover different aspects of the topic
-- Questions should be clear and well-defined
-- Format: Return only the questions, one per line, no numbering or bullets"""),
-        HumanMessage(content=f'Generate research questions about: "{state["topic"]}"')
+        _SYS_EXTRACT,
+        _HUMAN_EXTRACT,
+        HumanMessage(content=f'Topic: "{state["topic"]}"')
     ]
     
-    response = await llm.ainvoke(messages)
+    # Speculatively start each question's search as soon as its line arrives, overlapping
+    # the searches with the rest of the generation. Repeated questions are dropped before
+    # they cost a search.
+    questions = []
+    pending_searches = []
+    seen = set()
+    try:
+        async for line in _astream_lines(_llm("extract"), messages, node="extract_questions", variant="plain"):
+            question = line.strip()
+            key = _normalize_question(question)
+            if key and key not in seen:
+                seen.add(key)
+                questions.append(question)
+                pending_searches.append(asyncio.create_task(search_question(question)))
+    except BaseException:
+        for task in pending_searches:
+            task.cancel()
+        raise
     
-    questions = [
-        line.strip() 
-        for line in response.content.split('\n') 
-        if line.strip()
-    ]
-    
-    elapsed_ms = int((time.time() - start_time) * 1000)
-    logger.info("questions_extracted", count=len(questions), elapsed_ms=elapsed_ms)
-    
-    state["questions"] = questions
-    state["task_times"]["extract_questions"] = elapsed_ms
-    
-    return state
-
-
-async def research(state: ResearchState) -> ResearchState:
-    start_time = time.time()
-    logger.info("starting_research", questions_count=len(state["questions"]))
-    
-    async def research_question(question: str) -> ResearchResult:
-        logger.info("researching_question", question=question)
-        
-        llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-        tavily_tool = TavilySearchTool()
-        
-        llm_with_tools = llm.bind_tools([tavily_tool])
-        
-        messages = [
-            SystemMessage(content="""Search for information to answer the research question.
-Use the tavily_search tool to find relevant information. Search for specific, factual information that directly addresses the question."""),
-            HumanMessage(content=f'Research this question: "{question}"')
-        ]
-        
-        response = await llm_with_tools.ainvoke(messages)
-        
-        findings = []
-        if response.tool_calls:
-            for tool_call in response.tool_calls:
-                if tool_call["name"] == "tavily_search":
-                    search_results = await tavily_tool.ainvoke(tool_call["args"])
-                    
-                    for result in search_results.get("results", [])[:3]:
-                        findings.append(Finding(
-                            title=result.get("title", ""),
-                            url=result.get("url", ""),
-                            content=result.get("content", "")
-                        ))
-        
-        return ResearchResult(question=question, findings=findings)
-    
-    research_tasks = [research_question(q) for q in state["questions"]]
-    results = await asyncio.gather(*research_tasks)
-    
-    elapsed_ms = int((time.time() - start_time) * 1000)
-    logger.info("research_completed", results_count=len(results), elapsed_ms=elapsed_ms)
-    
-    state["research_results"] = results
-    state["task_times"]["research"] = elapsed_ms
-    
-    return state
-
-
-async def summarize(state: ResearchState) -> ResearchState:
-    start_time = time.time()
-    logger.info("starting_summarization")
-    
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-    
-    findings_text = "\n\n".join([
-        f"Question: {result['question']}\nFindings:\n" + 
-        "\n".join([
-            f"- {finding['title']} ({finding['url']}): {finding['content']}"
-            for finding in result['findings']
-        ])
-        for result in state["research_results"]
-    ])
+    elapsed_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+    log_info("questions_extracted", topic=state["topic"], count=len(questions), elapsed_ms=elapsed_ms)
     
-    messages = [
-        SystemMessage(content="""You are a research assistant. Summarize the key findings from this research.
+    return {
+        "questions": questions,
+        "pending_searches": pending_searches,
+        "task_times": {"extract_questions": elapsed_ms}
+    }
 
-Requirements:
-- Create a concise summary (3-5 paragraphs) of the most important findings
-- Focus on facts and insights that directly relate to the topic
-- Organize information logically
-- Use clear, professional language
-- Do not include URLs or citations in the summary"""),
-        HumanMessage(content=f"""Summarize the research findings about "{state['topic']}":
 
-{findings_text}""")
+def _normalize_question(question: str) -> str:
+    # Strip the question marks before collapsing whitespace so "What is A ?" matches "What is A?"
+    return " ".join(question.casefold().rstrip("? \t").split())
+
+
+def _forced_search_args(response: AIMessage) -> dict:
+    # tool_choice forces one tavily_search call, but max_tokens can still cut its arguments
+    # off, in which case LangChain reports it under invalid_tool_calls instead
+    if response.tool_calls:
+        return response.tool_calls[0]["args"]
+    if response.invalid_tool_calls:
+        invalid = response.invalid_tool_calls[0]
+        raise ValueError(
+            f"{invalid.get('name')} call arguments were truncated or malformed: {invalid.get('args')!r}"
+        )
+    raise ValueError("model returned no tavily_search call")
+
+
+async def _plan_searches(question: str) -> List[dict]:
+    # Original path: let the LLM decide what to search for via a tool call
+    messages = [
+        _SYS_PLAN,
+        _HUMAN_PLAN,
+        HumanMessage(content=f'Question: "{question}"')
     ]
     
-    response = await llm.ainvoke(messages)
+    try:
+        async with _SEM:
+            args = await _ainvoke_llm(
+                _llm_with_tools(),
+                messages,
+                node="research",
+                variant="forced_tool",
+                parse=_forced_search_args
+            )
+    except ValueError as e:
+        # Better to search the question as written than to report it without findings
+        logger.warning("planned_search_unusable", question=question, error=str(e))
+        args = {"query": question}
     
-    elapsed_ms = int((time.time() - start_time) * 1000)
-    logger.info("summarization_completed", summary_length=len(response.content), elapsed_ms=elapsed_ms)
+    return [await _search(args)]
+
+
+async def search_question(question: str) -> List[dict]:
+    # Runs in its own task, so this binding does not leak into the caller's context
+    structlog.contextvars.bind_contextvars(node="research")
+    log_info("researching_question", question=question)
     
-    state["summary"] = response.content
-    state["task_times"]["summarize"] = elapsed_ms
+    if USE_LLM_PLANNING:
+        return await _plan_searches(question)
+    # The questions are already search-ready, so skip the planning LLM turn
+    return [await _search({"query": question})]
+
+
+def _research_result(question: str, all_search_results: List[dict]) -> ResearchResult:
+    findings = []
+    for search_results in all_search_results:
+        for result in search_results.get("results", [])[:3]:
+            findings.append(Finding(
+                title=result.get("title", ""),
+                url=result.get("url", ""),
+                content=result.get("content", "")
+            ))
     
-    return state
+    return ResearchResult(question=question, findings=findings)
 
 
-async def generate_report(state: ResearchState) -> ResearchState:
-    start_time = time.time()
-    logger.info("starting_report_generation")
+async def research(state: ResearchState) -> dict:
+    start_ns = time.perf_counter_ns()
+    structlog.contextvars.bind_contextvars(node="research")
+    
+    # The searches were started during question extraction; only wait for them here
+    pending_searches = state["pending_searches"]
+    try:
+        all_search_results = await asyncio.gather(*pending_searches, return_exceptions=True)
+    except BaseException:
+        for task in pending_searches:
+            task.cancel()
+        raise
+    
+    # A question whose searches still failed after retries is reported without findings
+    # rather than failing the whole request
+    results = []
+    for question, search_results in zip(state["questions"], all_search_results):
+        # BaseException so a search that was cancelled is also reported without findings
+        if isinstance(search_results, BaseException):
+            logger.warning(
+                "research_question_failed",
+                question=question,
+                error=str(search_results) or type(search_results).__name__
+            )
+            search_results = []
+        results.append(_research_result(question, search_results))
+    
+    elapsed_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+    log_info(
+        "research_completed",
+        questions_count=len(state["questions"]),
+        results_count=len(results),
+        elapsed_ms=elapsed_ms
+    )
     
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+    return {
+        "research_results": results,
+        "pending_searches": [],
+        "task_times": {"research": elapsed_ms}
+    }
+
+
+async def summarize_and_report(state: ResearchState) -> dict:
+    start_ns = time.perf_counter_ns()
+    structlog.contextvars.bind_contextvars(node="summarize_and_report")
     
     questions_text = "\n- ".join(state["questions"])
     
-    raw_data_text = "\n\n".join([
-        f"Question: {result['question']}\nSources:\n" + 
-        "\n".join([
-            f"- {finding['title']} ({finding['url']})\n  {finding['content']}"
-            for finding in result['findings']
-        ])
-        for result in state["research_results"]
-    ])
+    # Write the research data into one buffer instead of joining nested intermediate strings
+    buf = io.StringIO()
+    write = buf.write
+    for i, result in enumerate(_compact_findings(state["research_results"])):
+        question, findings = result["question"], result["findings"]
+        if i:
+            write("\n\n")
+        write("Question: ")
+        write(question)
+        write("\nSources:\n")
+        for j, finding in enumerate(findings):
+            title, url, content = _finding_fields(finding)
+            if j:
+                write("\n")
+            write("- ")
+            write(title)
+            write(" (")
+            write(url)
+            write(")\n  ")
+            write(content)
+    raw_data_text = buf.getvalue()
     
+    # One call produces both the summary and the report, so the research data is sent once
     messages = [
-        SystemMessage(content="""You are a research assistant. Create a comprehensive research report.
-
-Requirements:
-- Create a well-structured markdown report
-- Include an executive summary
-- Organize findings by research question
-- Add a conclusion section
-- Include citations with URLs where appropriate
-- Use proper markdown formatting (headers, lists, etc.)
-- Make it professional and comprehensive"""),
-        HumanMessage(content=f"""Create a research report about "{state['topic']}" based on:
+        _SYS_REPORT,
+        _HUMAN_REPORT,
+        HumanMessage(content=f"""Topic: "{state['topic']}"
 
 Research Questions:
 - {questions_text}
 
-Summary of Findings:
-{state['summary']}
-
 Raw Research Data:
 {raw_data_text}""")
     ]
     
-    response = await llm.ainvoke(messages)
-    
-    elapsed_ms = int((time.time() - start_time) * 1000)
-    logger.info("report_generated", report_length=len(response.content), elapsed_ms=elapsed_ms)
+    output = await _ainvoke_llm(
+        _llm_json(),
+        messages,
+        node="summarize_and_report",
+        variant="json",
+        parse=lambda response: orjson.loads(response.content)
+    )
     
-    state["report"] = response.content
-    state["task_times"]["generate_report"] = elapsed_ms
+    elapsed_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+    log_info(
+        "summary_and_report_generated",
+        summary_length=len(output.get("summary", "")),
+        report_length=len(output.get("report", "")),
+        elapsed_ms=elapsed_ms
+    )
     
-    return state
\ No newline at end of file
+    return {
+        "summary": output.get("summary", ""),
+        "report": output.get("report", ""),
+        "task_times": {"summarize_and_report": elapsed_ms}
+    }